@@ -1,18 +1,30 @@
 import streamlit as st
-from streamlit_folium import st_folium
-import folium
 from geopy.geocoders import Nominatim
-from geopy.distance import geodesic
+from geopy.adapters import RequestsAdapter
+from geopy.extra.rate_limiter import RateLimiter
+import numpy as np
+import pytz
 import json
 import os
 import time
 import hashlib
+import hmac
+import threading
+import atexit
 from uuid import uuid4
 import re
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Tuple
-from PIL import Image
-import glob
+from collections import ChainMap, defaultdict
+from functools import lru_cache
+from itertools import count, islice
+from typing import Dict, Any, List, Optional, Tuple, TYPE_CHECKING
+from PIL import Image, ImageOps
+if TYPE_CHECKING:
+    import folium  # imported lazily in the map helpers so pages without a map skip it
+try:
+    import orjson  # C-accelerated JSON; stdlib json is the fallback
+except ImportError:
+    orjson = None
 
 def generate_form_key(prefix, donor):
     return f"{prefix}{donor['phone']}{donor.get('name', '')}_{donor.get('id', '')}"
@@ -23,40 +35,197 @@ def generate_form_key(prefix, user):
 st.set_page_config(page_title="Food Donation App", page_icon="🍲", layout="centered")
 # CONSTANTS / FILES
 DATA_FILE = "donations.json"
+DONATIONS_JOURNAL_FILE = "donations.journal.jsonl"  # appended per change, folded into DATA_FILE on compaction
+DONATION_SCHEMA = 2  # records stamped with this version skip load-time normalization
 USERS_FILE = "users.json"
+USERS_JOURNAL_FILE = "users.journal.jsonl"  # per-user appends, folded into USERS_FILE on save
+USERS_JOURNAL_COMPACT_AT = 500  # fold the journal into the snapshot once it has this many lines (on load and on append)
 FEEDBACK_FILE = "feedback.json"   # <--- new file
+FEEDBACK_JOURNAL_FILE = "feedback.journal.jsonl"  # one line per new entry, folded into FEEDBACK_FILE on load
+FEEDBACK_JOURNAL_COMPACT_AT = 500
 REPORTS_FILE = "reports.json"
 BLOCKED_FILE = "blocked_users.json"
+IMAGE_METADATA_FILE = "image_metadata.json"  # community photo filename -> caption
+COMMUNITY_IMAGES_DIR = "community_images"
+COMMUNITY_THUMBS_DIR = os.path.join(COMMUNITY_IMAGES_DIR, "thumbs")  # gallery-sized copies, same filenames
+COMMUNITY_IMAGE_MAX_PX = 1600  # longest edge kept for uploaded photos
+COMMUNITY_THUMB_PX = 384       # longest edge of gallery thumbnails (~2x a three-column cell)
+GALLERY_PAGE_SIZE = 12         # photos rendered per gallery page (four rows of three)
+GEOCACHE_FILE = "geocache.json"   # persistent address -> (lat, lon) cache
+GEOCACHE_TTL_S = 30 * 24 * 3600    # re-query addresses older than this (stale hit kept as fallback)
+GEOCACHE_MAX_ENTRIES = 5000        # oldest lookups are dropped beyond this
+DEFERRED_SAVE_DELAY_S = 0.2  # coalescing window for background full-file saves
 
 NEARBY_RADIUS_KM = 10  # show donors within this radius of the collector (km)
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG_LAT_MIN = 110.574  # shortest length of one degree of latitude; keeps bounding boxes conservative
+GEOCODE_MIN_CHARS = 3  # don't geocode fragments shorter than this
+COORD_DECIMALS = 5     # ~1 m; finer precision is noise for a pickup spot
 # Notification event labels
 DONOR_EVENTS = ("accepted", "picked_up", "cancelled")
 COLLECTOR_EVENTS = ("assigned", "unassigned")  # future-reserved (not shown now)
+NOTIFICATIONS_SHOWN = 50  # newest unseen notifications listed per section
+# Timestamp each status bucket is ordered by (newest first)
+STATUS_TS_KEY = {"active": "created_at", "accepted": "accepted_at", "picked_up": "picked_up_at", "cancelled": "cancelled_at"}
 FEEDBACK_MIN_LEN = 0
 FEEDBACK_MAX_LEN = 2000
 FEEDBACK_ALLOWED_RATINGS = [1, 2, 3, 4, 5]
+IST = pytz.timezone("Asia/Kolkata")   # Kerala, India timezone
+AVAILABILITY_FMT = "%Y-%m-%d %H:%M"
+FMT_TIME_MEMO_MAX = 4096  # formatted timestamps kept process-wide before the memo is reset
 # HELPERS: TIME, HASH, LINKS
 def now_ts() -> int:
     return int(time.time())
 
+@st.cache_resource
+def _fmt_time_memo() -> Dict[int, str]:
+    """
+    Process-wide {ts: formatted} memo. Streamlit re-executes this module on
+    every rerun, so a plain lru_cache here would start empty each time.
+    """
+    return {}
+
 def fmt_time(ts: Optional[int]) -> str:
     """Format a unix timestamp (seconds) to a human-readable local string."""
     if not ts:
         return "—"
     try:
-        return datetime.fromtimestamp(int(ts)).strftime("%Y-%m-%d %H:%M")
-    except Exception:
+        key = int(ts)
+    except (TypeError, ValueError):
         return "—"
+    memo = _fmt_time_memo()
+    out = memo.get(key)
+    if out is None:
+        try:
+            out = time.strftime("%Y-%m-%d %H:%M", time.localtime(key))
+        except (OverflowError, OSError, ValueError):
+            out = "—"
+        if len(memo) >= FMT_TIME_MEMO_MAX:
+            memo.clear()
+        memo[key] = out
+    return out
 
-def hash_password(password: str) -> str:
-    """Return SHA256 hashed password."""
-    return hashlib.sha256(password.encode()).hexdigest()
+@st.cache_resource
+def _donation_display_store() -> Dict[str, Dict[str, Any]]:
+    """
+    Per-donation display caches (formatted times, labels, widget keys,
+    directions link), keyed by donation id. Kept beside the shared records
+    rather than on them, so rendering never adds keys to a record that
+    another session may be serializing.
+    """
+    return {}
+
+def display_cache(d: Dict[str, Any]) -> Dict[str, Any]:
+    """This donation's entry in the display store (created on first use)."""
+    store = _donation_display_store()
+    entry = store.get(d["id"])
+    if entry is None:
+        entry = store.setdefault(d["id"], {})
+    return entry
 
+def fmt_field(d: Dict[str, Any], field: str) -> str:
+    """
+    fmt_time(d[field]) kept in the donation's display cache until that
+    timestamp changes, so history and notification rows skip formatting on reruns.
+    """
+    ts = d.get(field)
+    cache = display_cache(d).setdefault("fmt", {})
+    hit = cache.get(field)
+    if hit is None or hit[0] != ts:
+        hit = cache[field] = (ts, fmt_time(ts))
+    return hit[1]
+
+@lru_cache(maxsize=1024)
+def parse_availability(text: str) -> Optional[int]:
+    """Parse an 'Available Until' string (AVAILABILITY_FMT, IST) to a unix timestamp."""
+    try:
+        return int(IST.localize(datetime.strptime(text.strip(), AVAILABILITY_FMT)).timestamp())
+    except Exception:
+        return None
+
+_WS_RE = re.compile(r"\s+")
+
+def hash_password(password: str, salt: Optional[bytes] = None) -> str:
+    """Return a salted scrypt hash as 'scrypt$<salt hex>$<hash hex>'."""
+    salt = salt if salt is not None else os.urandom(16)
+    digest = hashlib.scrypt(password.encode(), salt=salt, n=2**14, r=8, p=1, dklen=32)
+    return f"scrypt${salt.hex()}${digest.hex()}"
+
+def verify_password(password: str, stored: str) -> bool:
+    """Constant-time check of password against a stored hash (scrypt or legacy SHA256)."""
+    if stored.startswith("scrypt$"):
+        _, salt_hex, _ = stored.split("$", 2)
+        candidate = hash_password(password, bytes.fromhex(salt_hex))
+    else:
+        candidate = hashlib.sha256(password.encode()).hexdigest()
+    return hmac.compare_digest(candidate, stored)
+
+def quantize_coord(x: float) -> float:
+    """Round a latitude/longitude to COORD_DECIMALS before caching or storing it."""
+    return round(float(x), COORD_DECIMALS)
+
+@lru_cache(maxsize=2048)
 def gmaps_dir_link(lat: float, lon: float) -> str:
     return f"https://www.google.com/maps/dir/?api=1&destination={lat},{lon}"
+
+def donation_gmaps_link(d: Dict[str, Any]) -> str:
+    """Directions link for a donation, built once and kept in its display cache (coords never change)."""
+    cache = display_cache(d)
+    link = cache.get("gmaps")
+    if link is None:
+        link = cache["gmaps"] = gmaps_dir_link(float(d["lat"]), float(d["lon"]))
+    return link
+@st.cache_resource
+def _id_source() -> Dict[str, Any]:
+    """Per-process random seed plus a counter: unique ids without a urandom read per id."""
+    return {"seed": uuid4().hex[:8], "counter": count()}
+
 def short_id(prefix: str = "") -> str:
     """Generate a short-ish unique id with optional prefix."""
-    return f"{prefix}{int(time.time()*1_000)}_{uuid4().hex[:8]}"
+    src = _id_source()
+    return f"{prefix}{int(time.time()*1_000)}_{src['seed']}{next(src['counter']):06x}"
+def button_keys(d: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Widget keys for a donation's buttons, built once and kept in its display
+    cache. Donation ids are unique, so no per-render index suffix is needed.
+    """
+    cache = display_cache(d)
+    keys = cache.get("btn_keys")
+    if keys is None:
+        did = d["id"]
+        keys = {
+            "cancel": f"cancel_{did}",
+            "seen_accepted": f"seen_accept_{did}",
+            "seen_picked_up": f"seen_pu_{did}",
+            "seen_cancelled": f"seen_cancel_{did}",
+            "accept": f"accept_{did}",
+            "pickup": f"pickup_{did}",
+            "cancel_accept": f"cancel_accept_{did}",
+            "hist_pickup": f"hist_pickup_{did}",
+            "hist_cancel_accept": f"hist_cancel_accept_{did}",
+        }
+        cache["btn_keys"] = keys
+    return keys
+
+def donation_labels(d: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Display strings for a donation (map tooltip, browse-list row), built once
+    and kept in its display cache until its status changes.
+    """
+    status = d.get("status", "active")
+    cache = display_cache(d)
+    labels = cache.get("label")
+    if labels is None or cache.get("label_status") != status:
+        food, qty, donor = d.get("food", "?"), d.get("quantity", "?"), d.get("donor", "?")
+        labels = {
+            "tooltip": f"{food} ({qty}) by {donor}",
+            "row": f"{food} • {qty} • {donor}",
+            "status": f" • Status: {status}",
+        }
+        cache["label"] = labels
+        cache["label_status"] = status
+    return labels
+
 def sanitize_feedback_text(text: str) -> str:
     """
     Simple normalization for feedback text:
@@ -65,80 +234,183 @@ def sanitize_feedback_text(text: str) -> str:
       - cap maximum length
     """
     text = (text or "").strip()
-    text = re.sub(r"\s+", " ", text)
+    text = _WS_RE.sub(" ", text)
     return text[:FEEDBACK_MAX_LEN]
 # STORAGE: LOAD / SAVE
 # -----------------------------------------------------------------------------
+def json_loads(data: bytes) -> Any:
+    return orjson.loads(data) if orjson else json.loads(data)
+
+def json_dumps(obj: Any) -> bytes:
+    """Compact JSON bytes; everything the app writes is only read back by the app."""
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _read_json_cached(path: str, mtime_ns: int, size: int, ino: int) -> Any:
+    """Parsed file contents, keyed on its stat so any write (save_json replaces the inode) misses."""
+    with open(path, "rb") as f:
+        return json_loads(f.read())
+
 def load_json(path: str, default):
-    if os.path.exists(path):
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return default
-    return default
+    """
+    Parse a JSON file, reusing the last parse while the file is unchanged.
+    Callers get their own copy (st.cache_data), so mutating it is safe.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return default
+    try:
+        return _read_json_cached(path, stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    except Exception:
+        return default
 
 def save_json(path: str, obj: Any):
-    tmp = f"{path}.tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(obj, f, indent=4)
-    os.replace(tmp, path)
+    """
+    Crash-safe write: a uniquely named temp file (O_EXCL, so concurrent savers
+    never share one), fsync, read-back hash check, atomic rename, then fsync
+    the directory so the rename itself is durable. Output is compact: these
+    files are only read by the app (pipe through `python -m json.tool` to
+    inspect one).
+    """
+    data = json_dumps(obj)
+    expected = hashlib.sha256(data).digest()
+    while True:
+        tmp = f"{path}.{os.getpid()}.{uuid4().hex[:8]}.tmp"
+        try:
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            continue
+        break
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        with open(tmp, "rb") as f:
+            if hashlib.sha256(f.read()).digest() != expected:
+                raise IOError(f"read-back mismatch writing {path}")
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    try:
+        dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return  # e.g. platforms without directory fds
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+def persistable(d: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop in-memory-only fields (names starting with '_') before writing a record."""
+    return {k: v for k, v in d.items() if not k.startswith("_")}
+
+def read_jsonl(path: str) -> List[Dict[str, Any]]:
+    """Read a line-delimited JSON file; a torn last line (crash mid-append) is skipped."""
+    entries: List[Dict[str, Any]] = []
+    if not os.path.exists(path):
+        return entries
+    with open(path, "rb") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json_loads(line))
+            except Exception:
+                continue
+    return entries
+
+def count_lines(path: str) -> int:
+    """Number of lines in a file (0 if it doesn't exist)."""
+    try:
+        with open(path, "rb") as f:
+            return sum(1 for _ in f)
+    except OSError:
+        return 0
+
+def append_jsonl(path: str, entries: List[Dict[str, Any]]):
+    """Append one JSON object per line."""
+    with open(path, "ab") as f:
+        f.write(b"".join(json_dumps(e) + b"\n" for e in entries))
 
 def load_donations() -> List[Dict[str, Any]]:
-    """Load donations, ensure required fields, fix duplicate IDs, and add status/timestamps if missing."""
+    """
+    Load donations: read the DATA_FILE snapshot, replay the append-only journal
+    on top of it (each journal line is a full donation record, last write wins),
+    then fix duplicate IDs and normalize any record not yet stamped with
+    DONATION_SCHEMA. The journal is compacted into the snapshot when it grows
+    past twice the number of donations (checked here and after every append
+    in update_donations), or after records were migrated.
+    """
     donations = load_json(DATA_FILE, [])
+    journal = read_jsonl(DONATIONS_JOURNAL_FILE)
+    if journal:
+        pos = {d.get("id"): i for i, d in enumerate(donations)}
+        for rec in journal:
+            i = pos.get(rec.get("id"))
+            if i is None:
+                pos[rec.get("id")] = len(donations)
+                donations.append(rec)
+            else:
+                donations[i] = rec
     seen_ids = set()
-    changed = False
+    changed = len(journal) > 2 * len(donations)
 
     for d in donations:
         # Ensure robust unique id
         if "id" not in d or d["id"] in seen_ids or not d["id"]:
-            d["id"] = f"{d.get('phone','')}{int(time.time()*1_000_000)}{uuid4().hex[:6]}"
+            d["id"] = short_id(d.get("phone", ""))
             changed = True
         seen_ids.add(d["id"])
 
-        # Ensure status field
-        if "status" not in d:
-            d["status"] = "active"
+        if d.get("schema") != DONATION_SCHEMA:
+            _migrate_donation(d)
             changed = True
 
-        # Ensure new fields exist (for compatibility)
-        d.setdefault("collector_name", None)
-        d.setdefault("collector_phone", None)
+    if changed:
+        save_donations(donations)
+    return donations
 
-        # Ensure timestamps
-        d.setdefault("created_at", now_ts())
-        d.setdefault("accepted_at", None)
-        d.setdefault("picked_up_at", None)
-        d.setdefault("cancelled_at", None)
+def _migrate_donation(d: Dict[str, Any]):
+    """Bring an older donation record up to DONATION_SCHEMA in place."""
+    # Ensure status field
+    d.setdefault("status", "active")
 
-        # Ensure lat/lon if present are numbers (avoid strings sneaking in)
-        if "lat" in d and isinstance(d["lat"], str):
-            try:
-                d["lat"] = float(d["lat"])
-                changed = True
-            except Exception:
-                d["lat"] = None
-                changed = True
-        if "lon" in d and isinstance(d["lon"], str):
-            try:
-                d["lon"] = float(d["lon"])
-                changed = True
-            except Exception:
-                d["lon"] = None
-                changed = True
+    # Ensure new fields exist (for compatibility)
+    d.setdefault("collector_name", None)
+    d.setdefault("collector_phone", None)
 
-        # Ensure quantity field exists for compatibility (new feature)
-        if "quantity" not in d:
-            d["quantity"] = None
-            changed = True
+    # Ensure timestamps
+    d.setdefault("created_at", now_ts())
+    d.setdefault("accepted_at", None)
+    d.setdefault("picked_up_at", None)
+    d.setdefault("cancelled_at", None)
 
-    if changed:
-        save_json(DATA_FILE, donations)
-    return donations
+    # Ensure lat/lon if present are numbers (avoid strings sneaking in)
+    for k in ("lat", "lon"):
+        if isinstance(d.get(k), str):
+            try:
+                d[k] = float(d[k])
+            except ValueError:
+                d[k] = None
+
+    # Ensure quantity field exists for compatibility (new feature)
+    d.setdefault("quantity", None)
+    d["schema"] = DONATION_SCHEMA
 
 def save_donations(donations: List[Dict[str, Any]]):
-    save_json(DATA_FILE, donations)
+    """Write a full snapshot; the journal is then redundant and is truncated."""
+    save_json(DATA_FILE, [persistable(d) for d in donations])
+    if os.path.exists(DONATIONS_JOURNAL_FILE):
+        os.remove(DONATIONS_JOURNAL_FILE)
 
 def load_users() -> Dict[str, Any]:
     """Users file structure:
@@ -148,12 +420,16 @@ def load_users() -> Dict[str, Any]:
         "email": "...",
         "password": "<sha256>",
         "seen": {
-            "donor": { "<donation_id>": { "accepted": true, "picked_up": true, "cancelled": true } },
-            "collector": { "<donation_id>": { "assigned": true, "unassigned": true } }
+            "donor": { "<donation_id>": ["accepted", "picked_up", "cancelled"] },
+            "collector": { "<donation_id>": ["assigned", "unassigned"] }
         }
       },
       ...
     }
+    In memory each per-donation event list is a set, so is_seen() is a single
+    membership test. The older { "<event>": true } form is migrated on load.
+    Single-user writes (registration, "Mark as seen" clicks, seen clears) are
+    appended to USERS_JOURNAL_FILE and replayed here.
     """
     users = load_json(USERS_FILE, {})
     changed = False
@@ -162,14 +438,58 @@ def load_users() -> Dict[str, Any]:
             rec["seen"] = {"donor": {}, "collector": {}}
             changed = True
         else:
-            rec["seen"].setdefault("donor", {})
-            rec["seen"].setdefault("collector", {})
+            rec["seen"] = _seen_from_disk(rec["seen"])
+
+    journal = read_jsonl(USERS_JOURNAL_FILE)
+    for e in journal:
+        op = e.get("op")
+        if op == "put" and isinstance(e.get("rec"), dict):
+            rec = e["rec"]
+            rec["seen"] = _seen_from_disk(rec.get("seen") or {})
+            users[e.get("phone")] = rec
+        elif op == "seen":
+            rec = users.get(e.get("phone"))
+            if rec is not None:
+                rec["seen"].setdefault(e["bucket"], {}).setdefault(e["donation_id"], set()).add(e["event"])
+        elif op == "unseen":
+            rec = users.get(e.get("phone"))
+            if rec is not None:
+                rec["seen"].get(e["bucket"], {}).pop(e["donation_id"], None)
+    if len(journal) >= USERS_JOURNAL_COMPACT_AT:
+        changed = True
+
     if changed:
-        save_json(USERS_FILE, users)
+        save_users(users)
     return users
 
+def _seen_from_disk(seen: Dict[str, Any]) -> Dict[str, Dict[str, set]]:
+    """Convert a stored seen-map to {bucket: {donation_id: set(events)}}."""
+    out: Dict[str, Dict[str, set]] = {"donor": {}, "collector": {}}
+    for bucket, by_id in seen.items():
+        if isinstance(by_id, dict):
+            out[bucket] = {
+                did: {e for e, v in evs.items() if v} if isinstance(evs, dict) else set(evs or ())
+                for did, evs in by_id.items()
+            }
+        elif isinstance(by_id, list):
+            # legacy list of {"id": ..., "event": ...}
+            for x in by_id:
+                if isinstance(x, dict) and x.get("id") and x.get("event"):
+                    out.setdefault(bucket, {}).setdefault(x["id"], set()).add(x["event"])
+    return out
+
+def _user_for_disk(rec: Dict[str, Any]) -> Dict[str, Any]:
+    """A user record with its seen-event sets turned into sorted lists."""
+    seen = rec.get("seen")
+    if isinstance(seen, dict):
+        rec = {**rec, "seen": {b: {did: sorted(evs) for did, evs in m.items()} for b, m in seen.items()}}
+    return rec
+
 def save_users(users: Dict[str, Any]):
-    save_json(USERS_FILE, users)
+    """Persist all users as a full snapshot; the journal is then truncated."""
+    save_json(USERS_FILE, {phone: _user_for_disk(rec) for phone, rec in users.items()})
+    if os.path.exists(USERS_JOURNAL_FILE):
+        os.remove(USERS_JOURNAL_FILE)
 
 def load_feedback() -> List[Dict[str, Any]]:
     """
@@ -188,9 +508,15 @@ def load_feedback() -> List[Dict[str, Any]]:
             "status_snapshot": "...",  # optional
         }
     }
+    New entries are appended to FEEDBACK_JOURNAL_FILE and replayed here
+    (entries already in the snapshot are skipped by id).
     """
     feedback = load_json(FEEDBACK_FILE, [])
-    changed = False
+    journal = read_jsonl(FEEDBACK_JOURNAL_FILE)
+    if journal:
+        known = {e.get("id") for e in feedback if isinstance(e, dict)}
+        feedback.extend(e for e in journal if e.get("id") not in known)
+    changed = len(journal) >= FEEDBACK_JOURNAL_COMPACT_AT
 
     # normalize legacy or malformed entries
     normed: List[Dict[str, Any]] = []
@@ -233,14 +559,16 @@ def load_feedback() -> List[Dict[str, Any]]:
         normed.append(e)
 
     if changed:
-        save_json(FEEDBACK_FILE, normed)
+        save_feedback(normed)
         return normed
     return feedback
 
 
 def save_feedback(feedback_list: List[Dict[str, Any]]):
-    """Persist all feedback entries."""
+    """Persist all feedback entries; the journal is then redundant and is removed."""
     save_json(FEEDBACK_FILE, feedback_list)
+    if os.path.exists(FEEDBACK_JOURNAL_FILE):
+        os.remove(FEEDBACK_JOURNAL_FILE)
 def load_reports() -> List[Dict[str, Any]]:
     return load_json(REPORTS_FILE, [])
 
@@ -254,21 +582,170 @@ def save_blocked_users(blocked: List[str]):
     save_json(BLOCKED_FILE, blocked)
 
 def is_blocked(phone: str) -> bool:
-    return phone in load_blocked_users()
+    return phone in _blocked_store()["set"]
 
 def block_user(phone: str):
+    store = _blocked_store()
+    if phone not in store["set"]:
+        store["list"].append(phone)
+        store["set"] = frozenset(store["list"])
+        save_blocked_users(store["list"])
+
+# SHARED STORES (parsed once per process, not once per session/rerun)         #
+@st.cache_resource
+def store_lock() -> threading.RLock:
+    """
+    Guards the shared donations and users stores and the donations index:
+    every change, every snapshot written from them and every walk over an
+    index bucket holds it, so no session iterates a dict another is resizing.
+    Re-entrant because _transition/add_donation call update_donations.
+    """
+    return threading.RLock()
+
+@st.cache_resource
+def _donations_store() -> List[Dict[str, Any]]:
+    """
+    The donations list shared by every session. Updates mutate this object in
+    place and are then written through to disk, so it never needs reloading.
+    """
+    return load_donations()
+
+@st.cache_resource
+def _users_store() -> Dict[str, Any]:
+    """The users dict shared by every session (write-through, like donations)."""
+    return load_users()
+
+@st.cache_resource
+def _feedback_store() -> List[Dict[str, Any]]:
+    """The feedback list shared by every session."""
+    return load_feedback()
+
+@st.cache_resource
+def _blocked_store() -> Dict[str, Any]:
+    """Blocked phones shared by every session: the persisted list and a frozenset for O(1) checks."""
     blocked = load_blocked_users()
-    if phone not in blocked:
-        blocked.append(phone)
-        save_blocked_users(blocked)
+    return {"list": blocked, "set": frozenset(blocked)}
+
+class _DeferredWriter:
+    """
+    Coalesces full-file saves off the request path: the latest object for
+    each path is serialized and written by one background timer that fires
+    DEFERRED_SAVE_DELAY_S after the first pending request. Only used for
+    files the app never reads back from disk within the same request.
+    """
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.pending: Dict[str, Any] = {}
+        self.timer: Optional[threading.Timer] = None
+
+    def schedule(self, path: str, obj: Any):
+        with self.lock:
+            self.pending[path] = obj
+            if self.timer is None:
+                self.timer = threading.Timer(self.delay, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.timer = None
+        for path, obj in pending.items():
+            save_json(path, obj)
+
+@st.cache_resource
+def _deferred_writer() -> _DeferredWriter:
+    writer = _DeferredWriter(DEFERRED_SAVE_DELAY_S)
+    atexit.register(writer.flush)
+    return writer
+
+def save_json_deferred(path: str, obj: Dict[str, Any]):
+    """
+    Schedule a background save of obj. A shallow copy is queued: the writer
+    thread serializes later, while sessions may still be adding keys to obj.
+    """
+    _deferred_writer().schedule(path, dict(obj))
+
+@st.cache_resource
+def _journal_lines() -> Dict[str, int]:
+    """Lines in each journal: counted once per process, then tracked on append."""
+    return {
+        "donations": count_lines(DONATIONS_JOURNAL_FILE),
+        "users": count_lines(USERS_JOURNAL_FILE),
+        "feedback": count_lines(FEEDBACK_JOURNAL_FILE),
+    }
+
+def journal_user_op(entry: Dict[str, Any]):
+    """
+    Append one users-journal op (caller holds store_lock). Once the journal
+    reaches USERS_JOURNAL_COMPACT_AT lines it is folded into USERS_FILE, so a
+    long-running process doesn't grow it without bound.
+    """
+    append_jsonl(USERS_JOURNAL_FILE, [entry])
+    lines = _journal_lines()
+    lines["users"] += 1
+    if lines["users"] >= USERS_JOURNAL_COMPACT_AT:
+        save_users(st.session_state.users)
+        lines["users"] = 0
+
+@st.cache_resource
+def _revisions() -> Dict[str, int]:
+    """Process-wide change counters; derived caches key on these."""
+    return {"donations": 0, "feedback": 0}
+
+def donations_rev() -> int:
+    return _revisions()["donations"]
+
+def feedback_rev() -> int:
+    return _revisions()["feedback"]
+
+def _index_donation(idx: Dict[str, Any], d: Dict[str, Any]):
+    """(Re)file one donation under its current status and collector phone."""
+    did = d.get("id")
+    idx["by_id"][did] = d
+    prev = idx["keys"].get(did)
+    if prev:
+        prev_status, prev_cphone = prev
+        idx["by_status"].get(prev_status, {}).pop(did, None)
+        if prev_cphone:
+            idx["by_collector"].get(prev_cphone, {}).pop(did, None)
+    status = d.get("status", "active")
+    cphone = d.get("collector_phone")
+    idx["by_status"].setdefault(status, {})[did] = d
+    if cphone:
+        idx["by_collector"].setdefault(cphone, {})[did] = d
+    idx["by_donor"].setdefault(d.get("phone"), {})[did] = d
+    idx["keys"][did] = (status, cphone)
+
+def _build_donations_index(donations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    idx: Dict[str, Any] = {"by_id": {}, "by_status": {}, "by_collector": {}, "by_donor": {}, "keys": {}}
+    for d in donations:
+        _index_donation(idx, d)
+    return idx
+
+@st.cache_resource
+def _donations_index() -> Dict[str, Any]:
+    """
+    Lookup tables over the shared donations store:
+      by_id:        { donation_id: donation }
+      by_status:    { status: { donation_id: donation } }
+      by_collector: { collector_phone: { donation_id: donation } }
+      by_donor:     { donor_phone: { donation_id: donation } }
+    update_donations() refiles only the records that changed.
+    """
+    return _build_donations_index(_donations_store())
+
+def donations_index() -> Dict[str, Any]:
+    return _donations_index()
 
 # SESSION STATE INIT                                                           #
 if "donations" not in st.session_state:
-    st.session_state.donations = load_donations()
+    st.session_state.donations = _donations_store()
 if "users" not in st.session_state:
-    st.session_state.users = load_users()
+    st.session_state.users = _users_store()
 if "feedback" not in st.session_state:
-    st.session_state.feedback = load_feedback()
+    st.session_state.feedback = _feedback_store()
 if "page" not in st.session_state:
     st.session_state.page = "login"
 if "user" not in st.session_state:
@@ -278,61 +755,288 @@ if "collector_coords" not in st.session_state:
 if "reports" not in st.session_state:
     st.session_state.reports = load_reports()
 if "blocked_users" not in st.session_state:
-    st.session_state.blocked_users = load_blocked_users()
+    st.session_state.blocked_users = _blocked_store()["list"]
 
 # GLOBALS & UPDATE SHORTCUTS                                                   #
-geolocator = Nominatim(user_agent="food_is_hope")
-def update_donations():
-    save_donations(st.session_state.donations)
-def update_users():
-    save_users(st.session_state.users)
-def update_feedback():
-    save_feedback(st.session_state.feedback)
+@st.cache_resource
+def get_geolocator() -> Nominatim:
+    """
+    One Nominatim client per process. Module-level objects are rebuilt on
+    every Streamlit rerun; caching the client keeps its requests.Session
+    (and its keep-alive connections) alive across reruns and sessions.
+    """
+    return Nominatim(user_agent="food_is_hope", timeout=5, adapter_factory=RequestsAdapter)
+
+@st.cache_resource
+def get_geocode() -> RateLimiter:
+    """
+    Process-wide rate-limited geocode callable: at most one Nominatim request
+    per second across all sessions (their usage policy), with two retries.
+    """
+    return RateLimiter(
+        get_geolocator().geocode, min_delay_seconds=1.0, max_retries=2, error_wait_seconds=2.0, swallow_exceptions=False,
+    )
+
+def update_donations(changed_ids: List[str]):
+    """
+    Persist the donations in changed_ids by appending them to the journal
+    (O(1) I/O per change); once the journal outgrows twice the donation
+    count, a full snapshot is written instead.
+    """
+    with store_lock():
+        _revisions()["donations"] += 1
+        idx = donations_index()
+        journal = _journal_lines()
+        by_id = idx["by_id"]
+        changed = [by_id[did] for did in dict.fromkeys(changed_ids) if did in by_id]
+        for d in changed:
+            _index_donation(idx, d)
+        append_jsonl(DONATIONS_JOURNAL_FILE, [persistable(d) for d in changed])
+        journal["donations"] += len(changed)
+        # same threshold as load_donations, so a long-running process doesn't
+        # leave an ever-growing journal for the next cold start to replay
+        if journal["donations"] > 2 * len(st.session_state.donations):
+            save_donations(st.session_state.donations)
+            journal["donations"] = 0
+
+def add_donation(d: Dict[str, Any]):
+    """Append a new donation to the store, index it, and journal it."""
+    with store_lock():
+        st.session_state.donations.append(d)
+        donations_index()["by_id"][d["id"]] = d
+        update_donations([d["id"]])
+
+def _transition(donation_id: str, from_status: str, updates: Dict[str, Any], owner: Optional[str] = None) -> bool:
+    """
+    Apply updates to one donation if it is still in from_status (and, with
+    owner, still assigned to that collector), then journal it. Returns whether
+    the transition happened; a stale click from another tab is a no-op.
+    """
+    with store_lock():
+        dd = donations_index()["by_id"].get(donation_id)
+        if dd is None or dd.get("status") != from_status:
+            return False
+        if owner is not None and dd.get("collector_phone") != owner:
+            return False
+        dd.update(updates)
+        update_donations([donation_id])
+    return True
+
+def get_user(phone: str) -> Optional[Dict[str, Any]]:
+    """Look up one user record by phone (None if not registered)."""
+    return st.session_state.users.get(phone)
+
+def save_user(phone: str, rec: Dict[str, Any]):
+    """Store one user record; only that record is written (journal append)."""
+    with store_lock():
+        st.session_state.users[phone] = rec
+        journal_user_op({"op": "put", "phone": phone, "rec": _user_for_disk(rec)})
 def update_reports():
     save_reports(st.session_state.reports)
 
 def update_blocked_users():
+    _blocked_store()["set"] = frozenset(st.session_state.blocked_users)
     save_blocked_users(st.session_state.blocked_users)
 
+# -----------------------------------------------------------------------------
+# GEOCODING (persistent cache)
+# -----------------------------------------------------------------------------
+@lru_cache(maxsize=1024)
+def normalize_address(addr: str) -> str:
+    """Cache key for an address: trimmed, lower-cased, whitespace collapsed."""
+    return _WS_RE.sub(" ", (addr or "").strip().lower())
+
+@st.cache_resource
+def _geocache() -> Dict[str, Dict[str, Any]]:
+    """Address cache shared by all sessions; read from disk once per process."""
+    return load_json(GEOCACHE_FILE, {})
+
+def _fresh(hit: Optional[Dict[str, Any]]) -> bool:
+    return bool(hit) and now_ts() - hit.get("ts", 0) < GEOCACHE_TTL_S
+
+def geocode_address(addr: str) -> Optional[Tuple[float, float]]:
+    """
+    Return (lat, lon) for an address. Repeat lookups of the same normalized
+    address are served from the cache until the entry is GEOCACHE_TTL_S old;
+    only successful results are stored, so a transient geocoder error is
+    retried on the next call (and an expired entry is still returned).
+    """
+    key = normalize_address(addr)
+    if not key:
+        return None
+    cache = _geocache()
+    hit = cache.get(key)
+    if _fresh(hit):
+        return hit["lat"], hit["lon"]
+    result = _geocode_miss(key, addr)
+    if result:
+        save_json_deferred(GEOCACHE_FILE, cache)
+    elif hit:
+        return hit["lat"], hit["lon"]
+    return result
+
+def _geocode_miss(key: str, addr: str) -> Optional[Tuple[float, float]]:
+    """
+    Query the geocoder and record a hit in the in-memory cache (caller
+    persists). Entries are kept in lookup order, so the oldest go first once
+    the cache is over GEOCACHE_MAX_ENTRIES.
+    """
+    try:
+        loc = get_geocode()(addr.strip())
+    except Exception:
+        return None
+    if not loc:
+        return None
+    lat, lon = quantize_coord(loc.latitude), quantize_coord(loc.longitude)
+    cache = _geocache()
+    cache.pop(key, None)
+    cache[key] = {"lat": lat, "lon": lon, "ts": now_ts()}
+    while len(cache) > GEOCACHE_MAX_ENTRIES:
+        cache.pop(next(iter(cache)), None)
+    return lat, lon
+
+def batch_geocode(addresses: List[str]) -> List[Optional[Tuple[float, float]]]:
+    """
+    Geocode many addresses (admin bulk operations). Each distinct normalized
+    address is resolved once, fresh cache hits never touch the network, and the
+    cache file is written once at the end. Misses are looked up one at a time:
+    Nominatim's usage policy allows a single request per second, so there is
+    nothing to gain from fanning them out concurrently.
+    """
+    cache = _geocache()
+    resolved: Dict[str, Optional[Tuple[float, float]]] = {}
+    fetched = False
+    for addr in addresses:
+        key = normalize_address(addr)
+        if not key or key in resolved:
+            continue
+        hit = cache.get(key)
+        if _fresh(hit):
+            resolved[key] = (hit["lat"], hit["lon"])
+            continue
+        resolved[key] = _geocode_miss(key, addr)
+        if resolved[key] is not None:
+            fetched = True
+        elif hit:
+            resolved[key] = (hit["lat"], hit["lon"])
+    if fetched:
+        save_json_deferred(GEOCACHE_FILE, cache)
+    return [resolved.get(normalize_address(a)) for a in addresses]
+
+def geocode_typed_address(addr: str) -> Optional[Tuple[float, float]]:
+    """
+    Geocode the address a user is typing (", India" first, then as-is).
+    Reruns where the text hasn't changed reuse this session's last successful
+    result without touching the cache or the network; a failed lookup is not
+    remembered, so asking again retries it.
+    """
+    addr = (addr or "").strip()
+    if len(addr) < GEOCODE_MIN_CHARS:
+        return None
+    if st.session_state.get("_geo_last_addr") == addr:
+        return st.session_state.get("_geo_last_result")
+    result = geocode_address(addr + ", India") or geocode_address(addr)
+    if result is not None:
+        st.session_state["_geo_last_addr"] = addr
+        st.session_state["_geo_last_result"] = result
+    return result
+
+# -----------------------------------------------------------------------------
+# DISTANCE (vectorized)
+# -----------------------------------------------------------------------------
+def haversine_km(lat0: float, lon0: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distance in km from (lat0, lon0) to every (lats[i], lons[i])."""
+    lat0_r = np.radians(lat0)
+    lats_r = np.radians(lats)
+    dlat = lats_r - lat0_r
+    dlon = np.radians(lons - lon0)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat0_r) * np.cos(lats_r) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+@st.cache_resource(max_entries=2)
+def _donation_arrays(rev: int, _donations: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Column view of every donation that has coordinates: parallel arrays
+    pos/lat/lon/status/collector_phone, where pos indexes into the donations
+    list. Rows are sorted by latitude so a radius query can binary-search its
+    latitude band. Rebuilt only when rev changes.
+    """
+    pos, lats, lons, statuses, collectors = [], [], [], [], []
+    for i, d in enumerate(_donations):
+        lat, lon = d.get("lat"), d.get("lon")
+        if isinstance(lat, (int, float)) and isinstance(lon, (int, float)):
+            pos.append(i)
+            lats.append(lat)
+            lons.append(lon)
+            statuses.append(d.get("status", "active"))
+            collectors.append(d.get("collector_phone") or "")
+    order = np.argsort(np.array(lats, dtype=float), kind="stable")
+    return {
+        "pos": np.array(pos, dtype=np.intp)[order],
+        "lat": np.array(lats, dtype=float)[order],
+        "lon": np.array(lons, dtype=float)[order],
+        "status": np.array(statuses, dtype="U10")[order],
+        "collector_phone": np.array(collectors, dtype=str)[order],
+    }
+
 # -----------------------------------------------------------------------------
 # NOTIFICATION "SEEN" HELPERS
 # -----------------------------------------------------------------------------
-def ensure_user_seen(phone: str):
-    users = st.session_state.users
-    if phone not in users:
-        return
-    u = users[phone]
-    if "seen" not in u or not isinstance(u["seen"], dict):
-        u["seen"] = {"donor": {}, "collector": {}}
-    else:
-        u["seen"].setdefault("donor", {})
-        u["seen"].setdefault("collector", {})
+def ensure_user_seen(phone: str) -> Optional[Dict[str, Any]]:
+    """Make sure the user's seen map has both buckets; returns it (None if no such user)."""
+    u = st.session_state.users.get(phone)
+    if u is None:
+        return None
+    with store_lock():
+        seen = u.get("seen")
+        if not isinstance(seen, dict):
+            seen = u["seen"] = {"donor": {}, "collector": {}}
+        else:
+            seen.setdefault("donor", {})
+            seen.setdefault("collector", {})
+    return seen
 
 def mark_seen(phone: str, role_bucket: str, donation_id: str, event: str):
     """role_bucket: 'donor' or 'collector'"""
-    users = st.session_state.users
-    if phone not in users:
-        return
-    ensure_user_seen(phone)
-    users[phone]["seen"][role_bucket].setdefault(donation_id, {})
-    users[phone]["seen"][role_bucket][donation_id][event] = True
-    update_users()
+    with store_lock():
+        seen = ensure_user_seen(phone)
+        if seen is None:
+            return
+        seen[role_bucket].setdefault(donation_id, set()).add(event)
+        # one ~100-byte append instead of rewriting every user's record
+        journal_user_op({
+            "op": "seen", "phone": phone, "bucket": role_bucket,
+            "donation_id": donation_id, "event": event, "ts": now_ts(),
+        })
+
+def _seen_bucket(phone: str, role_bucket: str) -> Dict[str, set]:
+    u = st.session_state.users.get(phone)
+    return u.get("seen", {}).get(role_bucket, {}) if u else {}
 
 def is_seen(phone: str, role_bucket: str, donation_id: str, event: str) -> bool:
-    users = st.session_state.users
-    if phone not in users:
-        return False
-    seen = users[phone].get("seen", {}).get(role_bucket, {})
-    return bool(seen.get(donation_id, {}).get(event, False))
+    return event in _seen_bucket(phone, role_bucket).get(donation_id, ())
+
+def latest_unseen(phone: str, donations: List[Dict[str, Any]], event: str) -> List[Dict[str, Any]]:
+    """
+    First NOTIFICATIONS_SHOWN donations whose donor `event` is still unseen.
+    `donations` is a status_partitions() bucket, already sorted newest first,
+    so this stops as soon as enough are found.
+    """
+    seen = _seen_bucket(phone, "donor")
+    unseen = (d for d in donations if event not in seen.get(d["id"], ()))
+    return list(islice(unseen, NOTIFICATIONS_SHOWN))
 
 def clear_seen_for_donation(phone: str, role_bucket: str, donation_id: str):
     """Optional helper to clear all events for one donation."""
-    users = st.session_state.users
-    if phone not in users:
-        return
-    if "seen" in users[phone] and role_bucket in users[phone]["seen"]:
-        users[phone]["seen"][role_bucket].pop(donation_id, None)
-        update_users()
+    u = st.session_state.users.get(phone)
+    with store_lock():
+        bucket = (u or {}).get("seen", {}).get(role_bucket)
+        if bucket is not None:
+            bucket.pop(donation_id, None)
+            journal_user_op({
+                "op": "unseen", "phone": phone, "bucket": role_bucket,
+                "donation_id": donation_id, "ts": now_ts(),
+            })
 # FEEDBACK HELPERS                                                             #
 def build_feedback_entry(
     role: str,
@@ -370,19 +1074,39 @@ def build_feedback_entry(
 
 
 def append_feedback(entry: Dict[str, Any]) -> None:
-    """Append one feedback entry to session and persist."""
-    st.session_state.feedback.append(entry)
-    update_feedback()
+    """
+    Append one feedback entry to session and persist it as one journal line;
+    the journal is folded into FEEDBACK_FILE once it reaches
+    FEEDBACK_JOURNAL_COMPACT_AT lines.
+    """
+    with store_lock():
+        st.session_state.feedback.append(entry)
+        _revisions()["feedback"] += 1
+        append_jsonl(FEEDBACK_JOURNAL_FILE, [entry])
+        lines = _journal_lines()
+        lines["feedback"] += 1
+        if lines["feedback"] >= FEEDBACK_JOURNAL_COMPACT_AT:
+            save_feedback(st.session_state.feedback)
+            lines["feedback"] = 0
+
+
+@st.cache_resource(max_entries=2)
+def _feedback_newest_first(rev: int, _feedback: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """All feedback sorted newest first; re-sorted only when feedback_rev() changes."""
+    return sorted(_feedback, key=lambda x: x.get("created_at") or 0, reverse=True)
+
+
+@st.cache_resource(max_entries=256)
+def _feedback_history(rev: int, role: str, my_phone: str, _feedback: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        f for f in _feedback_newest_first(rev, _feedback)
+        if f.get("role") == role and f.get("user_phone") == my_phone
+    ]
 
 
 def my_feedback_history(role: str, my_phone: str) -> List[Dict[str, Any]]:
     """Return feedback authored by the current user for a given role."""
-    out = []
-    for f in st.session_state.feedback:
-        if f.get("role") == role and f.get("user_phone") == my_phone:
-            out.append(f)
-    out.sort(key=lambda x: x.get("created_at") or 0, reverse=True)
-    return out
+    return _feedback_history(feedback_rev(), role, my_phone, st.session_state.feedback)
 
 
 def community_feedback_recent(limit: int = 25) -> List[Dict[str, Any]]:
@@ -391,9 +1115,7 @@ def community_feedback_recent(limit: int = 25) -> List[Dict[str, Any]]:
     The display anonymizes (respects the 'anonymous' flag) and excludes
     sensitive details (we only show role, rating, excerpt, and time).
     """
-    items = list(st.session_state.feedback)
-    items.sort(key=lambda x: x.get("created_at") or 0, reverse=True)
-    return items[:limit]
+    return _feedback_newest_first(feedback_rev(), st.session_state.feedback)[:limit]
 
 
 def feedback_role_badge(role: str) -> str:
@@ -418,7 +1140,11 @@ def feedback_excerpt(text: str, width: int = 160) -> str:
 # -----------------------------------------------------------------------------
 # AUTH / LOGIN PAGE (single form)
 # -----------------------------------------------------------------------------
-gmail_pattern = r"^[a-zA-Z0-9._%+-]+@gmail\.com$"
+GMAIL_RE = re.compile(r"^[a-z0-9._%+-]+@gmail\.com$", re.IGNORECASE)
+
+def is_gmail(email: str) -> bool:
+    """Cheap suffix check first; the regex only runs on plausible addresses."""
+    return email[-10:].lower() == "@gmail.com" and GMAIL_RE.match(email) is not None
 
 def login_page():
     st.markdown("<h1 style='text-align: center;'>🍽 NOURISH HUB</h1>", unsafe_allow_html=True)
@@ -435,7 +1161,7 @@ def login_page():
 
         # Live Gmail validation
         if email:
-            if re.match(gmail_pattern, email, re.IGNORECASE):
+            if is_gmail(email):
                 st.success("✅ Valid Gmail address")
             else:
                 st.warning("⚠ Please enter a valid Gmail address (like example@gmail.com)")
@@ -453,15 +1179,18 @@ def login_page():
             st.error("⚠ Invalid phone number. Please enter a 10-digit number.")
             return
 
-        users = st.session_state.users
+        existing = get_user(phone)
 
         # Existing user
-        if phone in users:
-            if users[phone]["password"] == hash_password(password):
+        if existing is not None:
+            if verify_password(password, existing["password"]):
+                if not existing["password"].startswith("scrypt$"):
+                    # Upgrade legacy SHA256 hashes on the first good login
+                    save_user(phone, {**existing, "password": hash_password(password)})
                 st.session_state.user = {
-                    "name": users[phone]["name"],
+                    "name": existing["name"],
                     "phone": phone,
-                    "email": users[phone]["email"],
+                    "email": existing["email"],
                 }
                 ensure_user_seen(phone)
                 st.session_state.page = "role_select"
@@ -474,16 +1203,15 @@ def login_page():
             if not (name and email):
                 st.error("⚠ New user detected. Please provide Name and Gmail to register.")
                 return
-            if not re.match(gmail_pattern, email or "", re.IGNORECASE):
+            if not is_gmail(email or ""):
                 st.error("⚠ Please register with a valid Gmail address (like example@gmail.com).")
                 return
-            users[phone] = {
+            save_user(phone, {
                 "name": name,
                 "email": email,
                 "password": hash_password(password),
                 "seen": {"donor": {}, "collector": {}},
-            }
-            update_users()
+            })
             st.session_state.user = {
                 "name": name,
                 "phone": phone,
@@ -613,6 +1341,21 @@ def feedback_widget(role: str, possible_donation_id: Optional[str] = None, statu
 # -----------------------------------------------------------------------------
 # DONOR PAGE
 # -----------------------------------------------------------------------------
+@st.cache_data(max_entries=64, show_spinner=False)
+def _donor_form_map(lat: float, lon: float, zoom: int, with_marker: bool) -> "folium.Map":
+    """
+    The donor form's pick-a-spot map. Callers pass coordinates rounded to 5
+    decimals (~1 m) so small nudges of the same address reuse the cached map.
+    st.cache_data hands every caller its own copy: st_folium's render adds
+    to the map's tree, so a map shared across reruns and sessions would grow
+    (and duplicate its tile layer) on every render.
+    """
+    import folium
+    m = folium.Map(location=[lat, lon], zoom_start=zoom)
+    if with_marker:
+        folium.Marker([lat, lon], tooltip="Suggested location").add_to(m)
+    return m
+
 def donor_page():
     st.header("🍎 Donor Dashboard")
     st.markdown("""
@@ -622,66 +1365,63 @@ def donor_page():
     """, unsafe_allow_html=True)
 
     # -------------------------------------------------------------------------
-    # Load Blocked Users and Filter Visible Donations
+    # This Donor's Donations by Status (none if the account is blocked)
     # -------------------------------------------------------------------------
-    blocked = load_blocked_users()
-    visible_donations = [d for d in st.session_state.donations if d["phone"] not in blocked]
-
     phone = st.session_state.user["phone"]
-    my_donations = [d for d in visible_donations if d.get("phone") == phone]
+    blocked = is_blocked(phone)
+    parts = defaultdict(list) if blocked else status_partitions("by_donor", phone)
 
     # -------------------------------------------------------------------------
     # AUTO-CANCEL EXPIRED DONATIONS (with IST timezone handling)
     # -------------------------------------------------------------------------
-    import pytz
-    from datetime import datetime
-
-    tz = pytz.timezone("Asia/Kolkata")   # Kerala, India timezone
-    now = int(datetime.now(tz).timestamp())
+    now = now_ts()
 
-    for d in my_donations:
-        if d.get("status") == "active":
+    expired_ids = []
+    with store_lock():
+        for d in parts["active"]:
             expiry_ts = d.get("availability_ts")
-            if expiry_ts and expiry_ts < now:
+            # re-check status: a collector may have accepted it since parts was cached
+            if d.get("status") == "active" and expiry_ts and expiry_ts < now:
                 d["status"] = "cancelled"
                 d["cancelled_at"] = now
                 d["cancel_reason"] = "Expired availability"
-                update_donations()
-
-    accepted = [d for d in my_donations if d.get("status") == "accepted"]
-    picked_up = [d for d in my_donations if d.get("status") == "picked_up"]
-    active_donations = [d for d in my_donations if d.get("status", "active") == "active"]
-    cancelled = [d for d in my_donations if d.get("status") == "cancelled"]
+                expired_ids.append(d["id"])
+        if expired_ids:
+            update_donations(expired_ids)
+    if expired_ids:
+        parts = status_partitions("by_donor", phone)
+
+    accepted = parts["accepted"]
+    picked_up = parts["picked_up"]
+    active_donations = parts["active"]
+    cancelled = parts["cancelled"]
+    my_donations = [] if blocked else donation_history("by_donor", phone)
 
     # -------------------------------------------------------------------------
     # Notifications — ACCEPTED
     # -------------------------------------------------------------------------
     if accepted:
         st.subheader("🤝 Accepted by Collector")
-        for idx, d in enumerate(sorted(accepted, key=lambda x: x.get("accepted_at") or 0, reverse=True)):
+        for idx, d in enumerate(latest_unseen(phone, accepted, "accepted")):
             cname = d.get("collector_name") or "a collector"
             cphone = d.get("collector_phone") or "N/A"
-            when = fmt_time(d.get("accepted_at"))
+            when = fmt_field(d, "accepted_at")
             did = d["id"]
 
-            seen_key = f"seen_accept_{did}_{idx}"
-            is_event_seen = is_seen(phone, "donor", did, "accepted")
-
-            if not is_event_seen:
-                st.info(
-                    f"Your donation {d.get('food','?')} ({d.get('quantity','?')}) at {d.get('location','?')} "
-                    f"was accepted by {cname} (📞 {cphone}) at {when}."
-                )
-                if st.button("Mark as seen", key=seen_key):
-                    mark_seen(phone, "donor", did, "accepted")
-                    st.rerun()
+            st.info(
+                f"Your donation {d.get('food','?')} ({d.get('quantity','?')}) at {d.get('location','?')} "
+                f"was accepted by {cname} (📞 {cphone}) at {when}."
+            )
+            if st.button("Mark as seen", key=button_keys(d)["seen_accepted"]):
+                mark_seen(phone, "donor", did, "accepted")
+                st.rerun()
             # else:
             #     with st.expander(f"Seen: {d.get('food','?')} accepted by {cname} at {when}"):
             #         st.write("You have marked this notification as seen.")
             #         if st.button("Unhide (show again)", key=f"unsee_accept_{did}_{idx}"):
             #             users = st.session_state.users
-            #             users[phone]["seen"]["donor"].setdefault(did, {})
-            #             users[phone]["seen"]["donor"][did].pop("accepted", None)
+            #             users[phone]["seen"]["donor"].setdefault(did, set())
+            #             users[phone]["seen"]["donor"][did].discard("accepted")
             #             update_users()
             #             st.rerun()
 
@@ -690,29 +1430,25 @@ def donor_page():
     # -------------------------------------------------------------------------
     if picked_up:
         
-        for idx, d in enumerate(sorted(picked_up, key=lambda x: x.get("picked_up_at") or 0, reverse=True)):
+        for idx, d in enumerate(latest_unseen(phone, picked_up, "picked_up")):
             cname = d.get("collector_name") or "Collector"
-            when = fmt_time(d.get("picked_up_at"))
+            when = fmt_field(d, "picked_up_at")
             did = d["id"]
 
-            is_event_seen = is_seen(phone, "donor", did, "picked_up")
-            seen_key = f"seen_pu_{did}_{idx}"
-
-            if not is_event_seen:
-                st.success(
-                    f"Your donation {d.get('food','?')} ({d.get('quantity','?')}) at {d.get('location','?')} "
-                    f"was picked up by {cname} at {when}!"
-                )
-                if st.button("Mark as seen", key=seen_key):
-                    mark_seen(phone, "donor", did, "picked_up")
-                    st.rerun()
+            st.success(
+                f"Your donation {d.get('food','?')} ({d.get('quantity','?')}) at {d.get('location','?')} "
+                f"was picked up by {cname} at {when}!"
+            )
+            if st.button("Mark as seen", key=button_keys(d)["seen_picked_up"]):
+                mark_seen(phone, "donor", did, "picked_up")
+                st.rerun()
             # else:
             #     with st.expander(f"Seen: {d.get('food','?')} picked up by {cname} at {when}"):
             #         st.write("You have marked this notification as seen.")
             #         if st.button("Unhide (show again)", key=f"unsee_pu_{did}_{idx}"):
             #             users = st.session_state.users
-            #             users[phone]["seen"]["donor"].setdefault(did, {})
-            #             users[phone]["seen"]["donor"][did].pop("picked_up", None)
+            #             users[phone]["seen"]["donor"].setdefault(did, set())
+            #             users[phone]["seen"]["donor"][did].discard("picked_up")
             #             update_users()
             #             st.rerun()
 
@@ -721,23 +1457,21 @@ def donor_page():
     # -------------------------------------------------------------------------
     if active_donations:
         st.subheader("Your Active Donations")
-        for idx, d in enumerate(sorted(active_donations, key=lambda x: x.get("created_at") or 0, reverse=True)):
+        for idx, d in enumerate(active_donations):
             st.info(
                 f"🍲 {d.get('food','?')} • {d.get('quantity','?')} | 📍 {d.get('location','?')} | ⏳ {d.get('availability','?')} | "
-                f"🕒 Created: {fmt_time(d.get('created_at'))}"
+                f"🕒 Created: {fmt_field(d, 'created_at')}"
             )
 
             col1, col2 = st.columns(2)
             with col1:
                 if st.button(
-                    f"❌ Cancel '{d.get('food','item')}'", key=f"cancel_{d.get('id','noid')}_{idx}"
+                    f"❌ Cancel '{d.get('food','item')}'", key=button_keys(d)["cancel"]
                 ):
-                    for dd in st.session_state.donations:
-                        if dd["id"] == d["id"]:
-                            dd["status"] = "cancelled"
-                            dd["cancelled_at"] = int(datetime.now(tz).timestamp())
-                            dd["cancel_reason"] = "Manually cancelled by donor"
-                    update_donations()
+                    _transition(d["id"], "active", {
+                        "status": "cancelled", "cancelled_at": now_ts(),
+                        "cancel_reason": "Manually cancelled by donor",
+                    })
                     st.rerun()
             with col2:
                 st.write("")
@@ -747,26 +1481,25 @@ def donor_page():
     # -------------------------------------------------------------------------
     if cancelled:
         
-        for idx, d in enumerate(sorted(cancelled, key=lambda x: x.get("cancelled_at") or x.get("created_at") or 0, reverse=True)):
-            when = fmt_time(d.get("cancelled_at"))
+        for idx, d in enumerate(latest_unseen(phone, cancelled, "cancelled")):
+            when = fmt_field(d, "cancelled_at")
             did = d["id"]
             reason = d.get("cancel_reason", "Cancelled")
 
-            if not is_seen(phone, "donor", did, "cancelled"):
-                st.warning(
-                    f"Cancelled: {d.get('food','?')} • {d.get('quantity','?')} • {d.get('location','?')} • "
-                    f"🕒 Cancelled: {when} • Reason: {reason}"
-                )
-                if st.button("Mark as seen", key=f"seen_cancel_{did}_{idx}"):
-                    mark_seen(phone, "donor", did, "cancelled")
-                    st.rerun()
+            st.warning(
+                f"Cancelled: {d.get('food','?')} • {d.get('quantity','?')} • {d.get('location','?')} • "
+                f"🕒 Cancelled: {when} • Reason: {reason}"
+            )
+            if st.button("Mark as seen", key=button_keys(d)["seen_cancelled"]):
+                mark_seen(phone, "donor", did, "cancelled")
+                st.rerun()
             # else:
             #     with st.expander(f"Seen: Cancelled donation — {d.get('food','?')} at {when}"):
             #         st.write("You have marked this cancellation as seen.")
             #         if st.button("Unhide (show again)", key=f"unsee_cancel_{did}_{idx}"):
             #             users = st.session_state.users
-            #             users[phone]["seen"]["donor"].setdefault(did, {})
-            #             users[phone]["seen"]["donor"][did].pop("cancelled", None)
+            #             users[phone]["seen"]["donor"].setdefault(did, set())
+            #             users[phone]["seen"]["donor"][did].discard("cancelled")
             #             update_users()
             #             st.rerun()
 
@@ -775,44 +1508,48 @@ def donor_page():
     # -------------------------------------------------------------------------
     st.write("---")
     st.subheader("Add a New Donation")
+
+    # Geocoding only happens when "Locate" is pressed, never on form render
+    with st.form("donor_locate"):
+        locate_query = st.text_input("📍 Enter Your Location (required, e.g., 'MG Road, Bangalore')")
+        if st.form_submit_button("📍 Locate"):
+            geocoded = geocode_typed_address(locate_query) if locate_query else None
+            if geocoded:
+                st.session_state.donor_geocode = {"lat": geocoded[0], "lon": geocoded[1], "address": locate_query.strip()}
+            else:
+                st.warning("⚠ Could not find that location. Try a more specific address.")
+
+    donor_geocode = st.session_state.get("donor_geocode")
+
     with st.form("donor_form_main"):
         food_item = st.text_input("🍲 Food Item")
         quantity_text = st.text_input("📦 Quantity (e.g. '10 meals', '5 kg rice', '20 boxes')")
         availability = st.text_input("📅 Available Until (format: YYYY-MM-DD HH:MM)")
-        location_name = st.text_input("📍 Enter Your Location (required, e.g., 'MG Road, Bangalore')")
+        location_name = st.text_input(
+            "📍 Pickup Location",
+            value=donor_geocode["address"] if donor_geocode else "",
+        )
 
-        st.markdown("📍 Recommended: First type a specific address/landmark; the map will center there. Then click the exact pickup spot on the map to fine-tune.")
+        st.markdown("📍 Recommended: First locate a specific address/landmark above; the map will center there. Then click the exact pickup spot on the map to fine-tune.")
 
         default_center = [12.9716, 77.5946]
         map_center = default_center
         geocoded_lat = None
         geocoded_lon = None
 
-        try:
-            if location_name and location_name.strip():
-                safe_query = location_name.strip()
-                try:
-                    geocoded = geolocator.geocode(safe_query + ", India")
-                except Exception:
-                    geocoded = None
-                try:
-                    geocoded = geolocator.geocode(safe_query)
-                except Exception:
-                    geocoded = None
-                if geocoded:
-                    geocoded_lat = geocoded.latitude
-                    geocoded_lon = geocoded.longitude
-                    map_center = [geocoded_lat, geocoded_lon]
-        except Exception:
-            map_center = default_center
+        if donor_geocode:
+            geocoded_lat, geocoded_lon = donor_geocode["lat"], donor_geocode["lon"]
+            map_center = [geocoded_lat, geocoded_lon]
 
         zoom_level = 14 if map_center != default_center else 5
-        m = folium.Map(location=map_center, zoom_start=zoom_level)
-
-        if geocoded_lat and geocoded_lon:
-            folium.Marker([geocoded_lat, geocoded_lon], tooltip="Suggested location").add_to(m)
+        center_lat, center_lon = quantize_coord(map_center[0]), quantize_coord(map_center[1])
+        m = _donor_form_map(center_lat, center_lon, zoom_level, bool(geocoded_lat and geocoded_lon))
 
-        map_data = st_folium(m, height=380, width=700)
+        from streamlit_folium import st_folium
+        map_data = st_folium(
+            m, height=380, width=700, key=f"donor_map_{center_lat:.5f}_{center_lon:.5f}",
+            returned_objects=["last_clicked"],  # the only field read below
+        )
 
         submitted = st.form_submit_button("Save Donation")
         if submitted:
@@ -822,32 +1559,26 @@ def donor_page():
                 chosen_lat, chosen_lon = None, None
                 try:
                     if map_data and map_data.get("last_clicked"):
-                        chosen_lat = map_data["last_clicked"]["lat"]
-                        chosen_lon = map_data["last_clicked"]["lng"]
+                        chosen_lat = quantize_coord(map_data["last_clicked"]["lat"])
+                        chosen_lon = quantize_coord(map_data["last_clicked"]["lng"])
                 except Exception:
                     pass
 
+                if chosen_lat is None and donor_geocode and donor_geocode["address"] == location_name.strip():
+                    chosen_lat, chosen_lon = donor_geocode["lat"], donor_geocode["lon"]
+
                 if chosen_lat is None:
-                    try:
-                        loc = geolocator.geocode(location_name.strip() + ", India")
-                        if loc:
-                            chosen_lat, chosen_lon = loc.latitude, loc.longitude
-                    except Exception:
-                        pass
+                    loc = geocode_address(location_name.strip() + ", India")
+                    if loc:
+                        chosen_lat, chosen_lon = loc
 
                 if chosen_lat is None or chosen_lon is None:
                     st.error("⚠ Could not determine exact location.")
                 else:
                     try:
-                        unique_id = f"{phone}{int(time.time()*1_000_000)}{uuid4().hex[:6]}"
+                        unique_id = uuid4().hex
 
-                        # Parse availability into IST timestamp
-                        try:
-                            availability_dt = datetime.strptime(availability.strip(), "%Y-%m-%d %H:%M")
-                            availability_dt = tz.localize(availability_dt)  # localize to IST
-                            availability_ts = int(availability_dt.timestamp())
-                        except Exception:
-                            availability_ts = None
+                        availability_ts = parse_availability(availability)
 
                         new_donation = {
                             "id": unique_id,
@@ -858,20 +1589,20 @@ def donor_page():
                             "availability": availability,
                             "availability_ts": availability_ts,
                             "location": location_name,
-                            "lat": float(chosen_lat),
-                            "lon": float(chosen_lon),
+                            "lat": quantize_coord(chosen_lat),
+                            "lon": quantize_coord(chosen_lon),
                             "status": "active",
                             "collector_name": None,
                             "collector_phone": None,
-                            "created_at": int(datetime.now(tz).timestamp()),
+                            "created_at": now_ts(),
                             "accepted_at": None,
                             "picked_up_at": None,
                             "cancelled_at": None,
                             "cancel_reason": None,
+                            "schema": DONATION_SCHEMA,
                         }
 
-                        st.session_state.donations.append(new_donation)
-                        update_donations()
+                        add_donation(new_donation)
                         st.success("🎉 Donation saved successfully!")
                         st.rerun()
                     except Exception:
@@ -883,16 +1614,16 @@ def donor_page():
     st.write("---")
     with st.expander("📜 Donation History (All)"):
         if my_donations:
-            for d in sorted(my_donations, key=lambda x: x.get("created_at") or 0, reverse=True):
+            for d in my_donations:
                 status = d.get("status", "active")
-                accepted_at = fmt_time(d.get("accepted_at"))
-                picked_at = fmt_time(d.get("picked_up_at"))
-                cancelled_at = fmt_time(d.get("cancelled_at"))
+                accepted_at = fmt_field(d, "accepted_at")
+                picked_at = fmt_field(d, "picked_up_at")
+                cancelled_at = fmt_field(d, "cancelled_at")
                 reason = d.get("cancel_reason")
 
                 st.markdown(
                     f"- {d.get('food','?')} • {d.get('quantity','?')} • 📍 {d.get('location','?')} • "
-                    f"🕒 Created: {fmt_time(d.get('created_at'))} • "
+                    f"🕒 Created: {fmt_field(d, 'created_at')} • "
                     f"🏷 Status: {status}"
                     + (f" • 🤝 Accepted: {accepted_at}" if d.get("accepted_at") else "")
                     + (f" • ✅ Picked Up: {picked_at}" if d.get("picked_up_at") else "")
@@ -913,10 +1644,8 @@ def donor_page():
 
     # 🔹 Ensure interactions are loaded from JSON
      def load_interactions():
-      try:
-        return load_json("interactions.json")
-      except Exception:
-        return []
+      interactions = load_json("interactions.json", [])
+      return interactions if isinstance(interactions, list) else []
 
      def save_interactions(interactions):
       save_json("interactions.json", interactions)
@@ -935,14 +1664,20 @@ def donor_page():
 # Keep session_state in sync with JSON
      if "interactions" not in st.session_state:
       st.session_state["interactions"] = load_interactions()
+      st.session_state["interactions_rev"] = 0
 
 # Load collectors
      all_collectors = load_all_collectors()
 
 # Filter collectors based on past interactions (optional)
-     interacted_collectors = [
-     d for d in st.session_state["interactions"] if d.get("type") == "collector"
-      ]
+# (re-filtered only when interactions_rev changes, not on every rerun)
+     interactions_rev = st.session_state.setdefault("interactions_rev", 0)
+     if st.session_state.get("_interacted_rev") != interactions_rev:
+      st.session_state["_interacted_collectors"] = [
+      d for d in st.session_state["interactions"] if d.get("type") == "collector"
+       ]
+      st.session_state["_interacted_rev"] = interactions_rev
+     interacted_collectors = st.session_state["_interacted_collectors"]
 
 # Use interacted_collectors if available, else use all_collectors
      collector_options = interacted_collectors if interacted_collectors else all_collectors
@@ -964,7 +1699,7 @@ def donor_page():
             "reporter_phone": st.session_state.user["phone"],
             "reason": reason,
             "comment": comment,
-            "created_at": int(datetime.now(tz).timestamp()),
+            "created_at": now_ts(),
             "status": "pending"
         }
 
@@ -982,6 +1717,7 @@ def donor_page():
             "created_at": new_report["created_at"]
         }
         st.session_state["interactions"].append(new_interaction)
+        st.session_state["interactions_rev"] += 1
         save_interactions(st.session_state["interactions"])
 
         st.success(f"✅ Report submitted for {selected_collector['name']}")
@@ -995,122 +1731,232 @@ def donor_page():
 
 # COLLECTOR PAGE
 # -----------------------------------------------------------------------------
-def collector_page():
-    st.header("🚚 Collector Dashboard")
-    
-    st.markdown("""
-🔍 Verify food is properly packed before pickup..<br>
-🚴 Deliver with care and speed so every meal stays fresh and tasty.
-""", unsafe_allow_html=True)
-    
-    with st.form("collector_location_form"):
-        collector_location = st.text_input("📍 Enter Your Location (required, e.g., 'Indiranagar, Bangalore')")
-        submitted = st.form_submit_button("Set My Location")
+def _find_nearby_donations(me_phone: str, coords: Optional[Tuple[float, float, str]]) -> List[Dict[str, Any]]:
+    """
+    Donations a collector can act on: 'active', plus 'accepted' by this
+    collector. With a location set, only those within NEARBY_RADIUS_KM are
+    returned (nearest first, with distance_km); otherwise all with coordinates.
+    Returned dicts are copies.
+    """
+    nearby_donors = []
+    all_donations = st.session_state.donations
 
-    if submitted:
-        if not collector_location:
-            st.error("⚠ Please enter your location.")
-        else:
-            try:
-                loc = geolocator.geocode(collector_location)
-                if loc:
-                    st.session_state.collector_coords = (loc.latitude, loc.longitude, collector_location)
-                    st.success(f"📍 Location set to: {collector_location}")
-                else:
-                    st.error("⚠ Could not find that location. Please try a more specific address.")
-            except Exception:
-                st.error("⚠ Error processing location. Please try again.")
+    if coords:
+        clat, clon = coords[0], coords[1]
+        # Binary-search the latitude band, cut by status and longitude inside
+        # it, exact haversine only on the survivors, then walk nearest first
+        with store_lock():
+            cols = _donation_arrays(donations_rev(), all_donations)
+        dlat = NEARBY_RADIUS_KM / KM_PER_DEG_LAT_MIN
+        dlon = dlat / max(np.cos(np.radians(clat)), 1e-6)
+        lo = np.searchsorted(cols["lat"], clat - dlat, side="left")
+        hi = np.searchsorted(cols["lat"], clat + dlat, side="right")
+        status = cols["status"][lo:hi]
+        box = lo + np.flatnonzero(
+            ((status == "active") | ((status == "accepted") & (cols["collector_phone"][lo:hi] == me_phone)))
+            & (np.abs(cols["lon"][lo:hi] - clon) <= dlon)
+        )
+        km = haversine_km(clat, clon, cols["lat"][box], cols["lon"][box])
+        within = np.flatnonzero(km <= NEARBY_RADIUS_KM)
+        with store_lock():
+            for j in within[np.argsort(km[within], kind="stable")]:
+                d = all_donations[cols["pos"][box[j]]]
+                d_copy = {**d}
+                d_copy["distance_km"] = round(float(km[j]), 2)
+                nearby_donors.append(d_copy)
+    else:
+        idx = donations_index()
+        with store_lock():
+            candidates = list(idx["by_status"].get("active", {}).values()) + [
+                d for d in idx["by_collector"].get(me_phone, {}).values() if d.get("status") == "accepted"
+            ]
+            for d in candidates:
+                if d.get("lat") and d.get("lon"):
+                    nearby_donors.append({**d})
+    return nearby_donors
+
+def nearby_donations_for(me_phone: str, coords: Optional[Tuple[float, float, str]]) -> List[Dict[str, Any]]:
+    """
+    Session-cached _find_nearby_donations(): reruns triggered by unrelated
+    widgets reuse the last result until donations or the location change.
+    """
+    key = (donations_rev(), me_phone, (round(coords[0], 4), round(coords[1], 4)) if coords else None)
+    if st.session_state.get("_browse_key") != key:
+        st.session_state["_browse_result"] = _find_nearby_donations(me_phone, coords)
+        st.session_state["_browse_key"] = key
+    return st.session_state["_browse_result"]
+
+def status_partitions(table: str, phone: str) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Donations filed under phone in donations_index()[table] ('by_donor' or
+    'by_collector'), grouped by status in one pass, each bucket sorted newest
+    first by its STATUS_TS_KEY timestamp. Session-cached on (donations
+    revision, phone) so unrelated reruns skip the walk and the sorts entirely.
+    """
+    key = (donations_rev(), phone)
+    if st.session_state.get(f"_parts_key_{table}") != key:
+        parts: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        with store_lock():
+            for d in donations_index()[table].get(phone, {}).values():
+                parts[d.get("status", "active")].append(d)
+        for status, group in parts.items():
+            ts_key = STATUS_TS_KEY.get(status, "created_at")
+            group.sort(key=lambda x: x.get(ts_key) or x.get("created_at") or 0, reverse=True)
+        st.session_state[f"_parts_{table}"] = parts
+        st.session_state[f"_parts_key_{table}"] = key
+    return st.session_state[f"_parts_{table}"]
+
+def donation_history(table: str, phone: str) -> List[Dict[str, Any]]:
+    """
+    All donations filed under phone in donations_index()[table], newest
+    created first. Session-cached on (donations revision, phone), like
+    status_partitions.
+    """
+    key = (donations_rev(), phone)
+    if st.session_state.get(f"_hist_key_{table}") != key:
+        with store_lock():
+            rows = list(donations_index()[table].get(phone, {}).values())
+        rows.sort(key=lambda x: x.get("created_at") or 0, reverse=True)
+        st.session_state[f"_hist_{table}"] = rows
+        st.session_state[f"_hist_key_{table}"] = key
+    return st.session_state[f"_hist_{table}"]
+
+_POPUP_TPL = (
+    "<b>{food}</b> • <b>{quantity}</b> by {donor}"
+    "<br>📍 {location}<br>⏳ {availability}<br>📞 {phone}<br>{extra}{dist}"
+    "<br><a href='{link}' target='_blank'>➡ Directions</a>"
+)
+_POPUP_DEFAULTS = {k: "?" for k in ("food", "quantity", "donor", "location", "availability", "phone")}
 
+@st.cache_data(max_entries=32, show_spinner=False)
+def collector_map(rev: int, me_phone: str, coords: Optional[Tuple[float, float, str]], _donors: List[Dict[str, Any]]) -> "folium.Map":
+    """
+    The collector map with its markers. (rev, me_phone, coords) fully determine
+    _donors, so the map is only rebuilt when one of them changes; st.cache_data
+    hands every caller its own copy, so st_folium can render it freely.
+    """
+    import folium
+    from folium.plugins import MarkerCluster
     # Map center
-    if st.session_state.collector_coords:
-        map_center = [st.session_state.collector_coords[0], st.session_state.collector_coords[1]]
+    if coords:
+        map_center = [coords[0], coords[1]]
     else:
         map_center = [12.9716, 77.5946]  # default center (Bangalore)
 
     m = folium.Map(location=map_center, zoom_start=12)
 
-    # Filter donors: show 'active', plus 'accepted by me'
-    nearby_donors = []
-    all_donations = st.session_state.donations
-    me_phone = st.session_state.user["phone"]
-
-    if st.session_state.collector_coords:
-        clat, clon, cname = st.session_state.collector_coords
+    if coords:
+        clat, clon, cname = coords
         folium.Marker(
             [clat, clon],
             popup=f"🧍 Collector: {cname}",
             icon=folium.Icon(color="blue", icon="user")
         ).add_to(m)
 
-        for d in all_donations:
-            if d.get("lat") is None or d.get("lon") is None:
-                continue
-            status = d.get("status", "active")
-            if status not in ("active", "accepted"):
-                continue
-            if status == "accepted" and d.get("collector_phone") != me_phone:
-                continue
-
-            d_coords = (d["lat"], d["lon"])
-            dist = geodesic((clat, clon), d_coords).km
-            if dist <= NEARBY_RADIUS_KM:
-                d_copy = {**d}
-                d_copy["distance_km"] = round(dist, 2)
-                nearby_donors.append(d_copy)
-    else:
-        for d in all_donations:
-            status = d.get("status", "active")
-            if status == "active" or (status == "accepted" and d.get("collector_phone") == me_phone):
-                if d.get("lat") and d.get("lon"):
-                    nearby_donors.append({**d})
-
-    # donor markers
-    for d in nearby_donors:
-        link = gmaps_dir_link(d["lat"], d["lon"])
+    # donor markers: one GeoJson layer (a single template render instead of one
+    # per marker), clustered client-side so dense areas stay light
+    features = []
+    for d in _donors:
+        link = donation_gmaps_link(d)
         status = d.get("status", "active")
         extra = f" • Status: {status}"
         if status == "accepted":
             cname = d.get("collector_name") or "Collector"
             extra += f" (by {cname})"
-        popup_html = (
-            f"<b>{d.get('food','?')}</b> • <b>{d.get('quantity','?')}</b> by {d.get('donor','?')}"
-            f"<br>📍 {d.get('location','?')}"
-            f"<br>⏳ {d.get('availability','?')}"
-            f"<br>📞 {d.get('phone','?')}"
-            f"<br>{extra}"
-        )
-        if "distance_km" in d:
-            popup_html += f"<br>📏 {d['distance_km']} km away"
-        popup_html += f"<br><a href='{link}' target='_blank'>➡ Directions</a>"
+        dist = f"<br>📏 {d['distance_km']} km away" if "distance_km" in d else ""
+        popup_html = _POPUP_TPL.format_map(ChainMap({"extra": extra, "dist": dist, "link": link}, d, _POPUP_DEFAULTS))
 
-        folium.Marker(
-            [d["lat"], d["lon"]],
-            popup=popup_html,
-            tooltip=f"{d.get('food','?')} ({d.get('quantity','?')}) by {d.get('donor','?')}",
-            icon=folium.Icon(color="green", icon="cutlery", prefix="fa"),
-        ).add_to(m)
+        features.append({
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [d["lon"], d["lat"]]},
+            "properties": {"popup": popup_html, "tooltip": donation_labels(d)["tooltip"]},
+        })
+
+    folium.GeoJson(
+        {"type": "FeatureCollection", "features": features},
+        marker=folium.Marker(icon=folium.Icon(color="green", icon="cutlery", prefix="fa")),
+        popup=folium.GeoJsonPopup(fields=["popup"], labels=False),
+        tooltip=folium.GeoJsonTooltip(fields=["tooltip"], labels=False),
+    ).add_to(MarkerCluster().add_to(m))
+
+    return m
+
+def collector_set_status(donation_id: str, action: str, me_phone: str):
+    """
+    on_click callback for the collector's Accept / Confirm Pickup / Cancel
+    Acceptance buttons. Runs before the fragment reruns, so no st.rerun().
+    Callbacks must not draw elements during a fragment rerun, so the
+    confirmation is left in session state for the fragment to show.
+    """
+    now = now_ts()
+    # action: (from_status, must be mine, updates, confirmation)
+    transitions = {
+        "accept": ("active", False, {
+            "status": "accepted", "collector_name": st.session_state.user["name"],
+            "collector_phone": me_phone, "accepted_at": now,
+        }, "✅ Request accepted! Donor will see a notification."),
+        "pickup": ("accepted", True, {
+            "status": "picked_up", "picked_up_at": now,
+        }, "🎉 Pickup confirmed! The donor will see a pickup notification."),
+        # revert to active, clear assignment + accepted_at
+        "cancel_accept": ("accepted", True, {
+            "status": "active", "collector_name": None, "collector_phone": None, "accepted_at": None,
+        }, "↩ Acceptance cancelled. Donation is visible to other collectors again."),
+    }
+    from_status, mine_only, updates, msg = transitions[action]
+    if _transition(donation_id, from_status, updates, me_phone if mine_only else None):
+        st.session_state["_collector_notice"] = msg
+
+def pickup_cancel_buttons(d: Dict[str, Any], me_phone: str, col_pickup, col_cancel, key_prefix: str):
+    """
+    "Confirm Pickup" / "Cancel Acceptance" for a donation accepted by me_phone,
+    shared by the browse panel (key_prefix "") and the history list ("hist_").
+    """
+    keys = button_keys(d)
+    with col_pickup:
+        st.button(
+            "✅ Confirm Pickup", key=keys[key_prefix + "pickup"],
+            on_click=collector_set_status, args=(d["id"], "pickup", me_phone),
+        )
+    with col_cancel:
+        st.button(
+            "❌ Cancel Acceptance", key=keys[key_prefix + "cancel_accept"],
+            on_click=collector_set_status, args=(d["id"], "cancel_accept", me_phone),
+        )
 
-    st_folium(m, height=500, width=800)
+@st.fragment
+def collector_browse_and_history(me_phone: str):
+    """
+    Browse list, accept/pickup/cancel buttons and collection history. Runs as
+    a fragment so its button clicks rerun only this block; nearby donations
+    are re-read here so a click's own change shows up immediately.
+    """
+    notice = st.session_state.pop("_collector_notice", None)
+    if notice:
+        st.toast(notice)
+    nearby_donors = nearby_donations_for(me_phone, st.session_state.collector_coords)
 
     # --- Browse & Accept / Confirm / Cancel Acceptance ---
     st.subheader("📋 Browse Donors")
-    active_labels = []
-    active_map = []
+    active: Dict[str, Dict[str, Any]] = {}   # donation id -> donation
+    active_labels: Dict[str, str] = {}       # donation id -> selectbox label
+    # nearby_donors already holds only 'active' and 'accepted by me' donations
     for d in nearby_donors:
-        status = d.get("status", "active")
-        if status == "active" or (status == "accepted" and d.get("collector_phone") == me_phone):
-            label = f"{d.get('food','?')} • {d.get('quantity','?')} • {d.get('donor','?')}"
-            if "distance_km" in d:
-                label += f" • {d['distance_km']} km"
-            label += f" • Status: {status}"
-            active_labels.append(label)
-            active_map.append(d)
-
-    if active_labels:
-        selected_label = st.selectbox("Select a donor to view details:", active_labels)
-        chosen = active_map[active_labels.index(selected_label)]
-
-        link = gmaps_dir_link(chosen["lat"], chosen["lon"])
+        labels = donation_labels(d)
+        label = labels["row"]
+        if "distance_km" in d:
+            label += f" • {d['distance_km']} km"
+        label += labels["status"]
+        active[d["id"]] = d
+        active_labels[d["id"]] = label
+
+    if active:
+        selected_id = st.selectbox(
+            "Select a donor to view details:", list(active), format_func=active_labels.__getitem__,
+        )
+        chosen = active[selected_id]
+
+        link = donation_gmaps_link(chosen)
         status = chosen.get("status", "active")
         status_line = f"- 🏷 Status: {status}"
         if status == "accepted":
@@ -1154,40 +2000,12 @@ def collector_page():
         colA, colB, colC = st.columns(3)
         if status == "active":
             with colA:
-                if st.button("🤝 Accept Request", key=f"accept_{chosen['id']}"):
-                    # Accept the donation (assign to me)
-                    for dd in st.session_state.donations:
-                        if dd["id"] == chosen["id"] and dd.get("status") == "active":
-                            dd["status"] = "accepted"
-                            dd["collector_name"] = st.session_state.user["name"]
-                            dd["collector_phone"] = me_phone
-                            dd.setdefault("created_at", now_ts())
-                            dd["accepted_at"] = now_ts()
-                    update_donations()
-                    st.success("✅ Request accepted! Donor will see a notification.")
-                    st.rerun()
+                st.button(
+                    "🤝 Accept Request", key=button_keys(chosen)["accept"],
+                    on_click=collector_set_status, args=(chosen["id"], "accept", me_phone),
+                )
         elif status == "accepted" and chosen.get("collector_phone") == me_phone:
-            with colB:
-                if st.button("✅ Confirm Pickup", key=f"pickup_{chosen['id']}"):
-                    for dd in st.session_state.donations:
-                        if dd["id"] == chosen["id"] and dd.get("status") == "accepted" and dd.get("collector_phone") == me_phone:
-                            dd["status"] = "picked_up"
-                            dd["picked_up_at"] = now_ts()
-                    update_donations()
-                    st.success("🎉 Pickup confirmed! The donor will see a pickup notification.")
-                    st.rerun()
-            with colC:
-                if st.button("❌ Cancel Acceptance", key=f"cancel_accept_{chosen['id']}"):
-                    # Revert to active, clear assignment + accepted_at
-                    for dd in st.session_state.donations:
-                        if dd["id"] == chosen["id"] and dd.get("status") == "accepted" and dd.get("collector_phone") == me_phone:
-                            dd["status"] = "active"
-                            dd["collector_name"] = None
-                            dd["collector_phone"] = None
-                            dd["accepted_at"] = None
-                    update_donations()
-                    st.info("↩ Acceptance cancelled. Donation is visible to other collectors again.")
-                    st.rerun()
+            pickup_cancel_buttons(chosen, me_phone, colB, colC, "")
         else:
             st.info("This donation is accepted by another collector.")
 
@@ -1197,58 +2015,74 @@ def collector_page():
     # --- Collection History for this Collector ---
     st.write("---")
     with st.expander("📜 My Collection History"):
-        accepted_by_me = [
-            d for d in st.session_state.donations
-            if d.get("status") == "accepted" and d.get("collector_phone") == me_phone
-        ]
-        picked_by_me = [
-            d for d in st.session_state.donations
-            if d.get("status") == "picked_up" and d.get("collector_phone") == me_phone
-        ]
+        mine = status_partitions("by_collector", me_phone)
+        accepted_by_me = mine["accepted"]
+        picked_by_me = mine["picked_up"]
 
         st.markdown("🤝 Accepted by Me (Pending Pickup)")
         if accepted_by_me:
-            for d in sorted(accepted_by_me, key=lambda x: x.get("accepted_at") or 0, reverse=True):
+            for d in accepted_by_me:
                 row = st.container()
                 with row:
                     st.info(
                         f"- 🍲 {d.get('food','?')} • {d.get('quantity','?')} • 👤 Donor: {d.get('donor','?')} • "
-                        f"📍 {d.get('location','?')} • 🕒 Accepted: {fmt_time(d.get('accepted_at'))}"
+                        f"📍 {d.get('location','?')} • 🕒 Accepted: {fmt_field(d, 'accepted_at')}"
                     )
                     c1, c2 = st.columns(2)
-                    with c1:
-                        if st.button("✅ Confirm Pickup", key=f"hist_pickup_{d['id']}"):
-                            for dd in st.session_state.donations:
-                                if dd["id"] == d["id"] and dd.get("status") == "accepted" and dd.get("collector_phone") == me_phone:
-                                    dd["status"] = "picked_up"
-                                    dd["picked_up_at"] = now_ts()
-                            update_donations()
-                            st.success("🎉 Pickup confirmed!")
-                            st.rerun()
-                    with c2:
-                        if st.button("❌ Cancel Acceptance", key=f"hist_cancel_accept_{d['id']}"):
-                            for dd in st.session_state.donations:
-                                if dd["id"] == d["id"] and dd.get("status") == "accepted" and dd.get("collector_phone") == me_phone:
-                                    dd["status"] = "active"
-                                    dd["collector_name"] = None
-                                    dd["collector_phone"] = None
-                                    dd["accepted_at"] = None
-                            update_donations()
-                            st.info("↩ Acceptance cancelled.")
-                            st.rerun()
+                    pickup_cancel_buttons(d, me_phone, c1, c2, "hist_")
         else:
             st.write("No pending pickups accepted by you.")
 
         st.markdown("✅ Picked Up by Me**")
         if picked_by_me:
-            for d in sorted(picked_by_me, key=lambda x: x.get("picked_up_at") or 0, reverse=True):
+            for d in picked_by_me:
                 st.success(
                     f"- 🍲 {d.get('food','?')} • {d.get('quantity','?')} • 👤 Donor: {d.get('donor','?')} • "
-                    f"📍 {d.get('location','?')} • 🕒 Picked Up: {fmt_time(d.get('picked_up_at'))}"
+                    f"📍 {d.get('location','?')} • 🕒 Picked Up: {fmt_field(d, 'picked_up_at')}"
                 )
         else:
             st.write("No completed pickups yet.")
 
+def collector_page():
+    st.header("🚚 Collector Dashboard")
+    
+    st.markdown("""
+🔍 Verify food is properly packed before pickup..<br>
+🚴 Deliver with care and speed so every meal stays fresh and tasty.
+""", unsafe_allow_html=True)
+    
+    with st.form("collector_location_form"):
+        collector_location = st.text_input("📍 Enter Your Location (required, e.g., 'Indiranagar, Bangalore')")
+        submitted = st.form_submit_button("Set My Location")
+
+    if submitted:
+        if not collector_location:
+            st.error("⚠ Please enter your location.")
+        else:
+            loc = geocode_address(collector_location)
+            if loc:
+                st.session_state.collector_coords = (loc[0], loc[1], collector_location)
+                st.success(f"📍 Location set to: {collector_location}")
+            else:
+                st.error("⚠ Could not find that location. Please try a more specific address.")
+
+    me_phone = st.session_state.user["phone"]
+    nearby_donors = nearby_donations_for(me_phone, st.session_state.collector_coords)
+
+    # No markers to show: skip building and rendering the map altogether
+    if nearby_donors:
+        from streamlit_folium import st_folium
+        st_folium(
+            collector_map(donations_rev(), me_phone, st.session_state.collector_coords, nearby_donors),
+            height=500, width=800, key="collector_map",
+            returned_objects=[],  # display only: nothing is read back
+        )
+    else:
+        st.info("🗺 No donations to show on the map yet.")
+
+    # Browsing and accept/pickup/cancel clicks rerun only this fragment, not the map
+    collector_browse_and_history(me_phone)
+
 # ---------------------------
     # FEEDBACK (COLLECTOR)
     # ---------------------------
@@ -1262,7 +2096,8 @@ def collector_page():
 # -----------------------------------------------------------------------------
 def load_feedback_records():
     """
-    Safely load feedback entries from feedback.json or feedback_data.json.
+    Feedback entries for the community wall: the shared feedback store
+    (feedback.json plus its journal), or legacy feedback_data.json if empty.
 
     Expected entry shape (any missing fields are handled safely):
     {
@@ -1274,29 +2109,66 @@ def load_feedback_records():
         "created_at": 1700000000    # optional unix ts
     }
     """
-    candidates = ["feedback.json", "feedback_data.json"]
-    for path in candidates:
-        if os.path.exists(path):
-            try:
-                with open(path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                # Ensure list
-                if isinstance(data, dict):
-                    # some apps store { "items": [...] }
-                    data = data.get("items", [])
-                if not isinstance(data, list):
-                    return []
-                return data
-            except json.JSONDecodeError:
-                return []
-            except Exception:
+    store = _feedback_store()
+    if store:
+        return list(store)
+    path = "feedback_data.json"
+    if os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                data = json_loads(f.read())
+            # Ensure list
+            if isinstance(data, dict):
+                # some apps store { "items": [...] }
+                data = data.get("items", [])
+            if not isinstance(data, list):
                 return []
+            return data
+        except Exception:
+            return []
     return []
 
 
 # -----------------------------------------------------------------------------
 # COMMUNITY PAGE (placeholder)
 # -----------------------------------------------------------------------------
+@st.cache_data(show_spinner=False, max_entries=8)
+def _list_dir_files(path: str, mtime_ns: int) -> List[str]:
+    """
+    Files in path, newest first; keyed on the directory's mtime, which changes
+    whenever an entry is added or removed.
+    """
+    with os.scandir(path) as it:
+        entries = [(e.stat().st_mtime_ns, e.path) for e in it if e.is_file()]
+    entries.sort(reverse=True)
+    return [p for _, p in entries]
+
+def gallery_files(path: str) -> List[str]:
+    """Community gallery image paths (newest first), rescanned only when the folder changes."""
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return []
+    return _list_dir_files(path, mtime_ns)
+
+def save_community_image(uploaded) -> str:
+    """
+    Store an uploaded photo as a progressive JPEG no larger than
+    COMMUNITY_IMAGE_MAX_PX, plus a COMMUNITY_THUMB_PX thumbnail for the
+    gallery. Orientation is applied first and EXIF (GPS etc.) is not carried
+    over. A short random suffix keeps uploads with the same name (or the same
+    stem, e.g. x.png after x.jpg) from replacing each other. Returns the
+    stored filename.
+    """
+    img = ImageOps.exif_transpose(Image.open(uploaded)).convert("RGB")
+    img.thumbnail((COMMUNITY_IMAGE_MAX_PX, COMMUNITY_IMAGE_MAX_PX), Image.LANCZOS)
+    stem = os.path.splitext(os.path.basename(uploaded.name))[0]
+    filename = f"{stem}_{uuid4().hex[:8]}.jpg"
+    img.save(os.path.join(COMMUNITY_IMAGES_DIR, filename), "JPEG", quality=82, progressive=True, optimize=True)
+    img.thumbnail((COMMUNITY_THUMB_PX, COMMUNITY_THUMB_PX), Image.LANCZOS)
+    img.save(os.path.join(COMMUNITY_THUMBS_DIR, filename), "JPEG", quality=80, optimize=True)
+    return filename
+
 def community_page():
     st.header("🤝 Community Dashboard")
     st.write("Here the community can view resources and events.")
@@ -1305,60 +2177,66 @@ def community_page():
         st.session_state.page = "role_select"
         st.rerun()
 
-    # Ensure image directory exists
-    save_dir = "community_images"
-    os.makedirs(save_dir, exist_ok=True)
+    # Ensure image directories exist
+    save_dir = COMMUNITY_IMAGES_DIR
+    os.makedirs(COMMUNITY_THUMBS_DIR, exist_ok=True)
 
     # Upload section
     st.subheader("📸 Share a Photo")
     uploaded_image = st.file_uploader("Upload an image", type=["png", "jpg", "jpeg"])
     caption = st.text_input("📝 Add a caption for your photo")
 
-    metadata_path = "image_metadata.json"
-
     if uploaded_image is not None and caption:
-        image = Image.open(uploaded_image)
-        save_path = os.path.join(save_dir, uploaded_image.name)
-        image.save(save_path)
-
-        # Load existing metadata or initialize
-        if os.path.exists(metadata_path):
-            try:
-                with open(metadata_path, "r") as f:
-                    metadata = json.load(f)
-            except json.JSONDecodeError:
+        # The uploader keeps its file across reruns: store each upload once,
+        # and treat a later caption edit as an update to that photo's entry
+        upload_key = getattr(uploaded_image, "file_id", uploaded_image.name)
+        if st.session_state.get("_community_upload_key") != upload_key:
+            st.session_state["_community_upload_file"] = save_community_image(uploaded_image)
+            st.session_state["_community_upload_key"] = upload_key
+            st.session_state["_community_upload_caption"] = None
+        if st.session_state.get("_community_upload_caption") != caption:
+            # Load existing metadata or initialize, then save the (new) caption
+            metadata = load_json(IMAGE_METADATA_FILE, {})
+            if not isinstance(metadata, dict):
                 metadata = {}
-        else:
-            metadata = {}
-
-        # Save new entry
-        metadata[uploaded_image.name] = caption
-        with open(metadata_path, "w") as f:
-            json.dump(metadata, f, indent=2)
+            metadata[st.session_state["_community_upload_file"]] = caption
+            save_json(IMAGE_METADATA_FILE, metadata)
+            st.session_state["_community_upload_caption"] = caption
 
         st.success("✅ Image and caption uploaded successfully!")
-        st.image(image, caption=caption, use_container_width=True)
+        st.image(
+            os.path.join(COMMUNITY_THUMBS_DIR, st.session_state["_community_upload_file"]),
+            caption=caption,
+        )
 
-    # Display gallery
     # Display gallery
     st.subheader("🌟 Community Gallery")
-    metadata_path = "image_metadata.json"
-    if os.path.exists(metadata_path):
-      try:
-        with open(metadata_path, "r") as f:
-            metadata = json.load(f)
-      except json.JSONDecodeError:
-            metadata = {}
-      except (ValueError, FileNotFoundError):
-            metadata = {}
-    else:
+    metadata = load_json(IMAGE_METADATA_FILE, {})
+    if not isinstance(metadata, dict):
         metadata = {}
 
-    image_files = glob.glob(os.path.join(save_dir, "*"))
-    for img_path in image_files:
+    image_files = gallery_files(save_dir)
+    pages = max(1, -(-len(image_files) // GALLERY_PAGE_SIZE))
+    page = min(st.session_state.get("gallery_page", 0), pages - 1)
+    st.session_state.gallery_page = page
+    start = page * GALLERY_PAGE_SIZE
+
+    thumbs = {os.path.basename(p) for p in gallery_files(COMMUNITY_THUMBS_DIR)}
+    cols = st.columns(3)
+    for i, img_path in enumerate(image_files[start:start + GALLERY_PAGE_SIZE]):
         filename = os.path.basename(img_path)
         caption = metadata.get(filename, "No caption provided")
-        st.image(img_path, caption=caption, use_container_width=True)
+        # photos uploaded before thumbnails existed are shown from the original
+        shown = os.path.join(COMMUNITY_THUMBS_DIR, filename) if filename in thumbs else img_path
+        cols[i % 3].image(shown, caption=caption, width="stretch")
+
+    if pages > 1:
+        c_prev, c_page, c_next = st.columns([1, 2, 1])
+        c_prev.button("◀ Newer", key="gallery_prev", disabled=page == 0,
+                      on_click=st.session_state.update, kwargs={"gallery_page": page - 1})
+        c_page.caption(f"Page {page + 1} of {pages}")
+        c_next.button("Older ▶", key="gallery_next", disabled=page == pages - 1,
+                      on_click=st.session_state.update, kwargs={"gallery_page": page + 1})
 
     # -------------------------------------------------------------------------
 # NEW: Reviews button & viewer (shows rating, feedback, and name if allowed)
@@ -1445,6 +2323,19 @@ def admin_panel():
                     st.info("Report rejected.")
                     st.rerun()
 
+    st.write("---")
+    with st.expander("🗺 Bulk Geocode Addresses"):
+        with st.form("admin_bulk_geocode"):
+            raw = st.text_area("Addresses (one per line)", height=160)
+            submitted = st.form_submit_button("Geocode")
+        if submitted:
+            addresses = [a.strip() for a in raw.splitlines() if a.strip()]
+            for addr, coords in zip(addresses, batch_geocode(addresses)):
+                if coords:
+                    st.write(f"📍 {addr} → {coords[0]:.5f}, {coords[1]:.5f}")
+                else:
+                    st.write(f"⚠ {addr} → not found")
+
 
 # ROUTER
 # -----------------------------------------------------------------------------